@@ -0,0 +1,291 @@
+"""Process-wide admission control for the transcription and workflow stages.
+
+Every Streamlit session runs in the same process, so concurrent "評価を開始"
+clicks share one controller. Each stage has a fixed number of slots sized
+from available memory and cores. Waiting requests are served strictly in
+FIFO order, and the uploads they hold while waiting count against a shared
+memory budget. When the queue or that budget is full, or a request waits
+too long, it is rejected with AdmissionRejected instead of overcommitting
+memory.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+import transcriber
+from transcriber import available_cores
+from utils.logger import logger
+
+# 0 の場合はメモリ・コア数から自動算出
+ADMISSION_TRANSCRIBE_SLOTS = int(os.getenv("ADMISSION_TRANSCRIBE_SLOTS", "0"))
+ADMISSION_WORKFLOW_SLOTS = int(os.getenv("ADMISSION_WORKFLOW_SLOTS", "0"))
+# 1 件あたりの作業メモリ（MB）。ローカル文字起こしの場合モデル本体は含まない
+ADMISSION_TRANSCRIBE_JOB_MB = int(os.getenv("ADMISSION_TRANSCRIBE_JOB_MB", "500"))
+ADMISSION_WORKFLOW_JOB_MB = int(os.getenv("ADMISSION_WORKFLOW_JOB_MB", "300"))
+# ローカル Whisper モデル 1 つあたりのメモリ（MB）。WHISPER_MAX_MODELS 個分を確保する
+ADMISSION_MODEL_MB = int(os.getenv("ADMISSION_MODEL_MB", "1500"))
+# API 呼び出し（Whisper API / LLM）は I/O 待ちが中心なのでコア数の倍数まで許可
+ADMISSION_IO_PER_CORE = int(os.getenv("ADMISSION_IO_PER_CORE", "2"))
+# アプリ本体のために残しておくメモリ（MB）
+ADMISSION_RESERVED_MB = int(os.getenv("ADMISSION_RESERVED_MB", "512"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "20"))
+ADMISSION_WAIT_TIMEOUT = float(os.getenv("ADMISSION_WAIT_TIMEOUT", "600"))
+
+STAGES = ("transcribe", "workflow")
+MB = 1024 * 1024
+
+_controller = None  # lazy-loaded process-wide controller
+_controller_lock = threading.Lock()
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a stage is saturated and the request is shed."""
+
+
+def available_memory_mb() -> int:
+    """
+    Memory available to this process in MB (cgroup limit aware)
+
+    Returns:
+        int: Available memory in MB
+    """
+    # cgroup v2 / v1（コンテナのメモリ上限）
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        # "max" や巨大値は上限なし
+        if limit.isdigit() and int(limit) < 1 << 60:
+            return max(0, (int(limit) - usage) // MB)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // MB
+
+
+def compute_capacity(memory_mb: int, cores: int) -> tuple[dict[str, int], int]:
+    """
+    Size each stage and the wait-queue memory budget
+
+    Local transcription runs at most WHISPER_NUM_WORKERS jobs at once inside
+    CTranslate2 (fewer if the configured threads exceed the cores), and its
+    models are counted once rather than per job. Whatever memory the running
+    jobs do not need is the budget for uploads held by waiting requests.
+
+    Args:
+        memory_mb (int): Available memory in MB
+        cores (int): Available CPU cores
+
+    Returns:
+        tuple[dict[str, int], int]: Slots per stage (at least 1 each) and queue budget in MB
+    """
+    remaining = max(0, memory_mb - ADMISSION_RESERVED_MB)
+
+    if transcriber.TRANSCRIBE_BACKEND == "local":
+        remaining = max(0, remaining - ADMISSION_MODEL_MB * max(1, transcriber.WHISPER_MAX_MODELS))
+        workers = max(1, transcriber.WHISPER_NUM_WORKERS)
+        # cpu_threads=0 の場合、エンジンは cores をワーカーで等分する
+        threads = transcriber.WHISPER_CPU_THREADS or max(1, cores // workers)
+        cpu_bound = min(workers, max(1, cores // threads))
+    else:
+        cpu_bound = cores * ADMISSION_IO_PER_CORE
+    transcribe = max(1, ADMISSION_TRANSCRIBE_SLOTS or min(cpu_bound, remaining // ADMISSION_TRANSCRIBE_JOB_MB))
+    remaining = max(0, remaining - transcribe * ADMISSION_TRANSCRIBE_JOB_MB)
+
+    workflow = max(1, ADMISSION_WORKFLOW_SLOTS or min(
+        cores * ADMISSION_IO_PER_CORE,
+        remaining // ADMISSION_WORKFLOW_JOB_MB,
+    ))
+    remaining = max(0, remaining - workflow * ADMISSION_WORKFLOW_JOB_MB)
+
+    return {"transcribe": transcribe, "workflow": workflow}, remaining
+
+
+class _ByteBudget:
+    """Memory held by waiting requests, shared across stages."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def fits(self, nbytes: int) -> bool:
+        with self.lock:
+            return self.used + nbytes <= self.limit
+
+    def reserve(self, nbytes: int) -> bool:
+        with self.lock:
+            if self.used + nbytes > self.limit:
+                return False
+            self.used += nbytes
+            return True
+
+    def release(self, nbytes: int):
+        with self.lock:
+            self.used -= nbytes
+
+
+class _Stage:
+    """Counting semaphore with a FIFO wait queue bounded by length and memory."""
+
+    def __init__(self, name: str, slots: int, max_queue: int, budget: _ByteBudget):
+        self.name = name
+        self.slots = slots
+        self.max_queue = max_queue
+        self.budget = budget
+        self.active = 0
+        self.queue: deque = deque()
+        self.cond = threading.Condition()
+
+    def _rejection(self, nbytes: int) -> str | None:
+        if len(self.queue) >= self.max_queue:
+            return f"{self.name}: wait queue is full ({self.max_queue})"
+        if not self.budget.fits(nbytes):
+            return f"{self.name}: no memory left for waiting uploads ({nbytes // MB}MB)"
+        return None
+
+    def check(self, nbytes: int = 0):
+        """Raise AdmissionRejected now if a request of nbytes could neither run nor wait."""
+        with self.cond:
+            if self.active < self.slots and not self.queue:
+                return
+            reason = self._rejection(nbytes)
+        if reason:
+            raise AdmissionRejected(reason)
+
+    def acquire(self, on_wait: Callable[[int], None] | None = None, timeout: float | None = None,
+                nbytes: int = 0) -> bool:
+        """Take a slot, waiting in FIFO order; returns True if the caller had to wait."""
+        with self.cond:
+            if self.active < self.slots and not self.queue:
+                self.active += 1
+                return False
+            reason = self._rejection(nbytes)
+            if reason or not self.budget.reserve(nbytes):
+                raise AdmissionRejected(reason or f"{self.name}: no memory left for waiting uploads")
+            ticket = object()
+            self.queue.append(ticket)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        last_position = None
+        try:
+            while True:
+                with self.cond:
+                    if self.queue[0] is ticket and self.active < self.slots:
+                        self.queue.popleft()
+                        self.active += 1
+                        return True
+                    position = self.queue.index(ticket) + 1
+                    if position == last_position:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if (remaining is not None and remaining <= 0) or not self.cond.wait(remaining):
+                            raise AdmissionRejected(f"{self.name}: timed out after {timeout:.0f}s in queue")
+                        continue
+                # 待ち順位の通知（UI 更新）はロックの外で行う
+                if on_wait:
+                    on_wait(position)
+                last_position = position
+        finally:
+            with self.cond:
+                if ticket in self.queue:
+                    self.queue.remove(ticket)
+                # 後続の待ち順位が変わったことを通知
+                self.cond.notify_all()
+            self.budget.release(nbytes)
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.cond:
+            return {"slots": self.slots, "active": self.active, "waiting": len(self.queue)}
+
+
+class AdmissionController:
+    """Per-stage slots shared by every session in the process."""
+
+    def __init__(self, slots: dict[str, int], *, queue_budget_mb: int,
+                 max_queue: int = ADMISSION_MAX_QUEUE, timeout: float = ADMISSION_WAIT_TIMEOUT):
+        self.timeout = timeout
+        self.budget = _ByteBudget(queue_budget_mb * MB)
+        self.stages = {name: _Stage(name, slots[name], max_queue, self.budget) for name in STAGES}
+
+    def check(self, stage: str, nbytes: int = 0):
+        """
+        Reject early, before an upload is copied into memory
+
+        Args:
+            stage (str): "transcribe" or "workflow"
+            nbytes (int, optional): Size of the upload. Defaults to 0.
+
+        Raises:
+            AdmissionRejected: If the request could neither run now nor wait
+        """
+        self.stages[stage].check(nbytes)
+
+    @contextmanager
+    def admit(self, stage: str, on_wait: Callable[[int], None] | None = None, nbytes: int = 0):
+        """
+        Hold one slot of a stage for the duration of the block
+
+        Args:
+            stage (str): "transcribe" or "workflow"
+            on_wait (Callable[[int], None], optional): Called with the 1-based queue position
+                while waiting, and with 0 once a request that had to wait is admitted. Defaults to None.
+            nbytes (int, optional): Memory the request holds while waiting (its upload). Defaults to 0.
+
+        Raises:
+            AdmissionRejected: If the queue or its memory budget is full, or the wait times out
+        """
+        s = self.stages[stage]
+        waited = s.acquire(on_wait, self.timeout, nbytes)
+        try:
+            if waited and on_wait:
+                on_wait(0)
+            yield
+        finally:
+            s.release()
+
+    def status(self) -> dict[str, dict]:
+        """Current slots / active / waiting counts per stage."""
+        return {name: s.snapshot() for name, s in self.stages.items()}
+
+
+def get_controller() -> AdmissionController:
+    """
+    Get the process-wide controller (lazy-loaded)
+
+    Returns:
+        AdmissionController: Shared controller
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            memory_mb, cores = available_memory_mb(), available_cores()
+            slots, queue_mb = compute_capacity(memory_mb, cores)
+            logger.info(
+                "Admission control: memory=%dMB cores=%d slots=%s queue_budget=%dMB",
+                memory_mb, cores, slots, queue_mb,
+            )
+            _controller = AdmissionController(slots, queue_budget_mb=queue_mb)
+        return _controller
+
+
+def admit(stage: str, on_wait: Callable[[int], None] | None = None, nbytes: int = 0):
+    """Shortcut for get_controller().admit(stage, on_wait, nbytes)."""
+    return get_controller().admit(stage, on_wait, nbytes)
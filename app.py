@@ -3,10 +3,10 @@ import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
 from workflow import run_pipeline
+from admission import AdmissionRejected, get_controller
 from sheets_client import append_row
 from utils.logger import logger
 import time
-from faster_whisper import WhisperModel
 
 # 環境変数を読み込む
 load_dotenv()
@@ -124,10 +124,9 @@ if uploaded_file is not None:
                 with status_container:
                     status = st.status("処理を開始しています...", expanded=True)
                     
-                # モデルをロードする
-                model = WhisperModel("medium", device="cpu", compute_type="int8")
-                # GPUがある場合は device="cuda" も可能
-                
+                # 混雑時はアップロードをコピーする前に受付を断る
+                get_controller().check("transcribe", uploaded_file.size)
+
                 # 音声ファイルを読み込み
                 file_bytes = uploaded_file.read()
                 
@@ -148,9 +147,16 @@ if uploaded_file is not None:
                 
                 # 最終的な処理を実行
                 status.update(label="AIによる評価を実行中...", state="running")
-                segments, info = model.transcribe(file_bytes, language="ja")
-                transcript = " ".join([segment.text for segment in segments])
-                result = run_pipeline(file_bytes)
+                stage_labels = {"transcribe": "文字起こし", "workflow": "AI評価"}
+
+                def show_queue_position(stage, position):
+                    # 混雑時は待ち順を表示する（0 は順番が回ってきたことを示す）
+                    if position == 0:
+                        status.update(label=f"{stage_labels[stage]}を実行中...", state="running")
+                    else:
+                        status.update(label=f"混雑のため順番待ち中です（{stage_labels[stage]}: {position}番目）...", state="running")
+
+                result = run_pipeline(file_bytes, source=uploaded_file.name, on_wait=show_queue_position)
                 
                 for i in range(50, 75):
                     time.sleep(0.01)
@@ -251,6 +257,11 @@ if uploaded_file is not None:
                 if sheets_success:
                     st.success("評価結果はGoogle Sheetsに正常に保存されました。", icon="✅")
                 
+            except AdmissionRejected as e:
+                status.update(label="混雑のため受け付けできませんでした", state="error")
+                logger.warning("受付制限: %s", str(e))
+                st.warning("現在ほかの評価処理が混み合っているため、受け付けできませんでした。しばらく待ってから再度お試しください。")
+
             except Exception as e:
                 st.error(f"評価処理中にエラーが発生しました: {e}")
                 logger.exception("評価処理エラー: %s", str(e))
@@ -258,31 +269,3 @@ if uploaded_file is not None:
 
 # フッター
 st.markdown('<div class="footer">SFIDA X テレチェック PoC v1.0.0</div>', unsafe_allow_html=True)
-
-# ローカルWhisperを使用する関数
-def whisper_transcribe_local(file_bytes: bytes) -> str:
-    """
-    ローカルWhisperモデルを使用して音声を文字起こし
-    
-    Args:
-        file_bytes (bytes): 音声ファイルのバイト
-        
-    Returns:
-        str: 文字起こしテキスト
-    """
-    import tempfile
-    from faster_whisper import WhisperModel
-    
-    # 一時ファイルに保存
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as temp_file:
-        temp_file.write(file_bytes)
-        temp_file.flush()
-        
-        # モデルをロード（初回実行時にダウンロードされます）
-        model = WhisperModel("medium", device="cpu", compute_type="int8")
-        
-        # 文字起こし実行（日本語を指定）
-        segments, info = model.transcribe(temp_file.name, language="ja")
-        transcript = " ".join([segment.text for segment in segments])
-        
-    return transcript 
\ No newline at end of file
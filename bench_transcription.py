@@ -0,0 +1,59 @@
+"""Benchmark local transcription settings and report real-time factor (RTF).
+
+RTF = processing time / audio duration (lower is faster; < 1.0 is faster than real time).
+Files are transcribed `workers` at a time, as concurrent sessions would, so the
+per-stream RTF shows contention and the throughput column (audio seconds
+processed per wall-clock second) shows what the host sustains overall.
+
+Usage:
+    python bench_transcription.py calls/*.wav --models medium small --threads 0 4 8 --workers 1 2 --batch-sizes 1 8
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import transcriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="+", type=Path, help="audio files to transcribe")
+    parser.add_argument("--models", nargs="+", default=["medium", "small"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[0], help="cpu_threads per worker (0 = auto)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, transcriber.WHISPER_BATCH_SIZE])
+    args = parser.parse_args()
+
+    files = [(path.name, path.read_bytes()) for path in args.audio]
+    print(f"cores={transcriber.available_cores()} compute_type={transcriber.WHISPER_COMPUTE_TYPE}")
+    print(f"{'model':<8} {'threads':>7} {'workers':>7} {'batch':>5} {'audio[s]':>9} {'time[s]':>8} {'RTF':>6} {'wall[s]':>8} {'x real':>7}")
+
+    for model, threads, workers, batch in itertools.product(args.models, args.threads, args.workers, args.batch_sizes):
+        # モデルロードは計測から除外する
+        transcriber.get_model(model, cpu_threads=threads, num_workers=workers)
+
+        def run(data, model=model, threads=threads, workers=workers, batch=batch):
+            return transcriber.transcribe_detailed(
+                data, model_size=model, cpu_threads=threads, num_workers=workers, batch_size=batch,
+            )[1]
+
+        # workers 件を同時に流し、実運用の同時セッションと同じ競合下で計測する
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, (data for _, data in files)))
+        wall = time.perf_counter() - start
+
+        total_audio = sum(stats["duration"] for stats in results)
+        total_elapsed = sum(stats["elapsed"] for stats in results)
+        rtf = total_elapsed / total_audio if total_audio else 0.0
+        throughput = total_audio / wall if wall else 0.0
+        resolved = transcriber.resolve_cpu_threads(threads, workers)
+        print(
+            f"{model:<8} {resolved:>7} {workers:>7} {batch:>5} {total_audio:>9.1f} {total_elapsed:>8.1f}"
+            f" {rtf:>6.3f} {wall:>8.1f} {throughput:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Local proper-noun corrector: rule-based replacement for the node_replace LLM pass.
+
+Implements the same rules as SYSTEM_PROMPTS["replace"] without an API call:
+company-name unification, fuzzy matching of agent names against
+``prompts.checker``, and normalisation of the 迷惑電話防止 / 電話が鳴る phrases.
+Everything else in the transcript is left untouched.
+"""
+import re
+from difflib import SequenceMatcher
+from prompts import checker
+
+COMPANY_NAME = "SFIDA X"
+NUISANCE_PHRASE = "迷惑電話防止"
+RING_PHRASE = "電話が鳴る"
+
+# 「迷惑電話防止」を探す会話冒頭の範囲（文字数）
+OPENING_WINDOW = 200
+# 担当者名のあいまい一致で置換する最小類似度。4 文字の読みで 1 文字違い（0.75）は
+# 別の名字（いまがわ / たけかわ など）なので置換しない
+NAME_MATCH_THRESHOLD = 0.8
+# あいまい一致の対象にする読みの最小文字数（「まだ」→「はまだ」などを防ぐ）
+NAME_MIN_READING = 3
+
+# 担当者名の読み（ひらがな）。prompts.checker に名前を追加したらここにも追加する
+CHECKER_READINGS: dict[str, list[str]] = {
+    "工藤": ["くどう"],
+    "前川": ["まえかわ", "まえがわ"],
+    "猪俣": ["いのまた"],
+    "田本": ["たもと"],
+    "立川": ["たちかわ", "たてかわ"],
+    "濱田": ["はまだ"],
+}
+
+# 漢字の誤変換・異体字
+NAME_VARIANTS: dict[str, list[str]] = {
+    "工藤": ["九藤", "功藤", "久藤"],
+    "前川": ["前河"],
+    "猪俣": ["猪股", "猪又", "井ノ又", "井之又", "猪の俣"],
+    "田本": ["田元", "多本"],
+    "立川": ["立河", "館川"],
+    "濱田": ["浜田", "濵田", "浜多"],
+}
+
+# ---------- kana / romaji normalisation ----------
+
+_ROMAJI_TABLE = {
+    "kya": "きゃ", "kyu": "きゅ", "kyo": "きょ", "sha": "しゃ", "shu": "しゅ", "sho": "しょ",
+    "cha": "ちゃ", "chu": "ちゅ", "cho": "ちょ", "nya": "にゃ", "nyu": "にゅ", "nyo": "にょ",
+    "hya": "ひゃ", "hyu": "ひゅ", "hyo": "ひょ", "mya": "みゃ", "myu": "みゅ", "myo": "みょ",
+    "rya": "りゃ", "ryu": "りゅ", "ryo": "りょ", "gya": "ぎゃ", "gyu": "ぎゅ", "gyo": "ぎょ",
+    "bya": "びゃ", "byu": "びゅ", "byo": "びょ", "pya": "ぴゃ", "pyu": "ぴゅ", "pyo": "ぴょ",
+    "shi": "し", "chi": "ち", "tsu": "つ", "ja": "じゃ", "ju": "じゅ", "jo": "じょ",
+    "ka": "か", "ki": "き", "ku": "く", "ke": "け", "ko": "こ",
+    "sa": "さ", "si": "し", "su": "す", "se": "せ", "so": "そ",
+    "ta": "た", "ti": "ち", "tu": "つ", "te": "て", "to": "と",
+    "na": "な", "ni": "に", "nu": "ぬ", "ne": "ね", "no": "の",
+    "ha": "は", "hi": "ひ", "fu": "ふ", "hu": "ふ", "he": "へ", "ho": "ほ",
+    "ma": "ま", "mi": "み", "mu": "む", "me": "め", "mo": "も",
+    "ya": "や", "yu": "ゆ", "yo": "よ",
+    "ra": "ら", "ri": "り", "ru": "る", "re": "れ", "ro": "ろ",
+    "wa": "わ", "wo": "を",
+    "ga": "が", "gi": "ぎ", "gu": "ぐ", "ge": "げ", "go": "ご",
+    "za": "ざ", "ji": "じ", "zi": "じ", "zu": "ず", "ze": "ぜ", "zo": "ぞ",
+    "da": "だ", "di": "ぢ", "du": "づ", "de": "で", "do": "ど",
+    "ba": "ば", "bi": "び", "bu": "ぶ", "be": "べ", "bo": "ぼ",
+    "pa": "ぱ", "pi": "ぴ", "pu": "ぷ", "pe": "ぺ", "po": "ぽ",
+    "a": "あ", "i": "い", "u": "う", "e": "え", "o": "お",
+}
+
+
+def _romaji_to_hiragana(text: str) -> str:
+    """Convert Hepburn romaji to hiragana; unknown characters are kept as-is."""
+    text = text.lower()
+    out = []
+    i = 0
+    while i < len(text):
+        # 促音（kk, tt など）
+        if i + 1 < len(text) and text[i] == text[i + 1] and text[i] not in "aeioun":
+            out.append("っ")
+            i += 1
+            continue
+        for size in (3, 2, 1):
+            chunk = text[i:i + size]
+            if chunk in _ROMAJI_TABLE:
+                out.append(_ROMAJI_TABLE[chunk])
+                i += size
+                break
+        else:
+            if text[i] == "n":
+                out.append("ん")
+            else:
+                out.append(text[i])
+            i += 1
+    return "".join(out)
+
+
+def to_hiragana(text: str) -> str:
+    """
+    Normalise kana / romaji text to hiragana for fuzzy comparison
+
+    Args:
+        text (str): Katakana, hiragana or romaji text
+
+    Returns:
+        str: Hiragana text (long-vowel marks are folded to う)
+    """
+    if re.fullmatch(r"[A-Za-z\s]+", text):
+        text = _romaji_to_hiragana(text.replace(" ", ""))
+    # カタカナ → ひらがな
+    text = "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+    return text.replace("ー", "う")
+
+
+def match_checker(token: str) -> str | None:
+    """
+    Find the checker name closest to a (possibly misrecognised) name token
+
+    Args:
+        token (str): Name as it appears in the transcript
+
+    Returns:
+        str | None: Canonical checker name, or None when nothing is close enough
+    """
+    if token in checker:
+        return token
+    for name, variants in NAME_VARIANTS.items():
+        if token in variants:
+            return name
+    reading = to_hiragana(token)
+    if not re.fullmatch(r"[ぁ-ゖ]+", reading) or len(reading) < NAME_MIN_READING:
+        return None
+    best_name, best_score = None, 0.0
+    for name in checker:
+        for candidate in CHECKER_READINGS.get(name, []):
+            # 候補より 2 文字以上短い読みは一致とみなさない
+            if len(reading) < len(candidate) - 1:
+                continue
+            score = SequenceMatcher(None, reading, candidate).ratio()
+            if score > best_score:
+                best_name, best_score = name, score
+    return best_name if best_score >= NAME_MATCH_THRESHOLD else None
+
+# ---------- precompiled patterns ----------
+
+_COMPANY_RE = re.compile(
+    r"(?:[SＳ]\s*[FＦ]\s*[IＩ]\s*[DＤ]\s*[AＡ](?:[\s・]*(?:[XＸ](?![A-Za-z])|エックス|クロス))?"
+    # カタカナ表記は前後がカタカナでない場合に限る（「スピーダー」「ハロネットワーク」は別の語）
+    r"|(?<![ァ-ヺー])(?:エ?ス[フプピ]ィ?ー?ダ(?:[\s・]*(?:クロス|エックス|[XＸ]))?|ハロー?ネット)(?![ァ-ヺー])"
+    r"|すふぃー?だ(?:くろす|えっくす)?)",
+    re.IGNORECASE,
+)
+
+# 名前の直前に付きやすい助詞。先頭の助詞を除いた語で一致しない場合に限り、
+# 助詞から始まる名前（はまだ など）として扱う
+_PARTICLES = "のはもがをにでとへ"
+_NAME_CHARS = r"(?P<name>[ぁ-ゖァ-ヺー一-龥々A-Za-z]{2,8}?)"
+
+# 名乗り（「SFIDA Xの××です」「私××と申します」など）の××部分。
+# 担当者名の置換はこの文脈に限り、顧客名・地名・社名などは変更しない。
+# 「です」は一般的な語尾なので社名に続く場合に限る
+_INTRO_RE = re.compile(
+    r"SFIDA X\s*の[、\s]*" + _NAME_CHARS
+    + r"(?=[、\s]*(?:と申し|ともうし|でございます|です))"
+    r"|(?:担当の|(?:私|わたし|わたくし)は??)[、\s]*" + _NAME_CHARS.replace("name", "self")
+    + r"(?=[、\s]*(?:と申し|ともうし|でございます))"
+    r"|(?:^|(?<=[。、！？\s]))" + _NAME_CHARS.replace("name", "bare")
+    + r"(?=[、\s]*(?:と申し|ともうし))",
+    re.MULTILINE,
+)
+
+_NUISANCE_RE = re.compile(
+    r"(?:迷惑|明確|名惑|めいわく|メイワク)\s*(?:電話|でんわ|デンワ)\s*"
+    r"(?:防止|防犯|対策|帽子|坊主|某氏|ぼうし|ボウシ)"
+)
+
+_RING_RE = re.compile(
+    r"電話が(?:鳴|な)(?:っています|ってます|っていました|りました|ります|る)"
+    r"|電話が(?:出てきました|出てきます|切れています|切れてます|切れました)"
+)
+
+# ---------- public entrypoint ----------
+
+
+def _replace_intro_name(match: re.Match) -> str:
+    group = next(g for g in ("name", "self", "bare") if match.group(g) is not None)
+    token = match.group(group)
+    start = match.start(group) - match.start(0)
+    # 「私はくどう」の「は」は助詞として残し、「はまだ」のように助詞を除くと
+    # 一致しない場合だけ助詞ごと名前とみなす
+    if token[0] in _PARTICLES and len(token) > 2:
+        name = match_checker(token[1:])
+        if name is not None:
+            return match.group(0)[:start + 1] + name
+    name = match_checker(token)
+    if name is None:
+        return match.group(0)
+    return match.group(0)[:start] + name
+
+
+def correct_proper_nouns(transcript: str) -> str:
+    """
+    Apply the node_replace rules locally (company / agent names, fixed phrases)
+
+    Args:
+        transcript (str): Raw transcript text
+
+    Returns:
+        str: Corrected transcript text; line breaks and all other words are preserved
+    """
+    text = _COMPANY_RE.sub(COMPANY_NAME, transcript)
+    text = _INTRO_RE.sub(_replace_intro_name, text)
+
+    # 冒頭の「迷惑電話防止」と、その後に続くコール音表現
+    text = _NUISANCE_RE.sub(
+        lambda m: NUISANCE_PHRASE if m.start() < OPENING_WINDOW else m.group(0), text
+    )
+    pos = text.find(NUISANCE_PHRASE, 0, OPENING_WINDOW + len(NUISANCE_PHRASE))
+    if pos >= 0:
+        text = text[:pos] + _RING_RE.sub(RING_PHRASE, text[pos:])
+    return text
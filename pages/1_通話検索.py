@@ -0,0 +1,47 @@
+import html
+import streamlit as st
+from search_index import search, get_call, list_agents, HIGHLIGHT_START, HIGHLIGHT_END
+
+# ページ設定
+st.set_page_config(
+    page_title="通話検索 | SFIDA X テレチェック",
+    page_icon="🔍",
+    layout="wide",
+)
+
+st.markdown("# 🔍 通話検索")
+st.caption("過去に評価した通話の文字起こし・報告を全文検索します。複数語はスペース区切りで AND 検索になります。")
+
+# 検索条件
+query_col, agent_col, verdict_col = st.columns([3, 1, 1])
+with query_col:
+    query = st.text_input("キーワード", placeholder="例: 他社名、クレーム、結構です")
+with agent_col:
+    agent = st.selectbox("担当者", ["すべて"] + list_agents())
+with verdict_col:
+    verdict = st.selectbox("判定", ["すべて", "問題あり", "問題なし"])
+
+results = search(
+    query,
+    agent=None if agent == "すべて" else agent,
+    verdict=None if verdict == "すべて" else verdict,
+)
+
+st.write(f"{len(results)} 件")
+
+for row in results:
+    label = f"#{row['id']}  {row['created_at']}  {row['agent']}  [{row['verdict']}]  {row['source'] or ''}"
+    with st.expander(label):
+        # マーカーを HTML エスケープ後に <mark> へ置換
+        snippet = html.escape(row["snippet"]).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+        st.markdown(snippet.replace("\n", "<br>"), unsafe_allow_html=True)
+
+        if row["summary"]:
+            st.markdown("**報告まとめ**")
+            for point in row["summary"].splitlines():
+                st.markdown(f"- {point}")
+
+        if st.toggle("文字起こし全文・評価結果を表示", key=f"detail_{row['id']}"):
+            call = get_call(row["id"])
+            st.text(call["transcript"])
+            st.json(call["result"])
@@ -0,0 +1,271 @@
+"""Full-text search over evaluated calls (SQLite FTS5 with the trigram tokenizer).
+
+The trigram tokenizer needs no word segmentation, so Japanese phrases of three
+or more characters are matched through the index. Terms of one or two
+characters (他社, 解約, surnames) are served by a second, contentless FTS5
+table holding each call's distinct unigrams and bigrams.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from utils.logger import logger
+
+SEARCH_DB_PATH = os.getenv(
+    "SEARCH_DB_PATH",
+    str(Path(__file__).resolve().parent / "data" / "calls.db"),
+)
+
+# snippet() の強調マーカー（UI 側で HTML エスケープ後に置換する）
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id          INTEGER PRIMARY KEY,
+    created_at  TEXT NOT NULL,
+    source      TEXT,
+    agent       TEXT,
+    verdict     TEXT,
+    transcript  TEXT NOT NULL,
+    summary     TEXT NOT NULL DEFAULT '',
+    result_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_calls_agent ON calls(agent);
+CREATE INDEX IF NOT EXISTS idx_calls_verdict ON calls(verdict);
+CREATE VIRTUAL TABLE IF NOT EXISTS calls_fts USING fts5(
+    transcript, summary,
+    content='calls', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS calls_ai AFTER INSERT ON calls BEGIN
+    INSERT INTO calls_fts(rowid, transcript, summary)
+    VALUES (new.id, new.transcript, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS calls_ad AFTER DELETE ON calls BEGIN
+    INSERT INTO calls_fts(calls_fts, rowid, transcript, summary)
+    VALUES ('delete', old.id, old.transcript, old.summary);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS calls_ngram USING fts5(
+    grams, content='', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS calls_ngram_ai AFTER INSERT ON calls BEGIN
+    INSERT INTO calls_ngram(rowid, grams)
+    VALUES (new.id, ngrams(new.transcript || ' ' || new.summary));
+END;
+CREATE TRIGGER IF NOT EXISTS calls_ngram_ad AFTER DELETE ON calls BEGIN
+    INSERT INTO calls_ngram(calls_ngram, rowid, grams)
+    VALUES ('delete', old.id, ngrams(old.transcript || ' ' || old.summary));
+END;
+"""
+
+_initialized: set[str] = set()
+
+
+def ngrams(text: str) -> str:
+    """
+    Distinct unigrams and bigrams of text, space-separated, for the calls_ngram table
+
+    Args:
+        text (str): Transcript and summary text
+
+    Returns:
+        str: Space-separated 1- and 2-character tokens (never spanning whitespace)
+    """
+    grams = set()
+    for run in text.split():
+        grams.update(run)
+        grams.update(run[i:i + 2] for i in range(len(run) - 1))
+    return " ".join(sorted(grams))
+
+
+def _connect(db_path: str | None = None) -> sqlite3.Connection:
+    path = db_path or SEARCH_DB_PATH
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    # calls_ngram のトリガーから呼ばれる
+    conn.create_function("ngrams", 1, ngrams, deterministic=True)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def format_transcript(labeled: str) -> str:
+    """
+    Convert the speaker-separation output into "speaker: text" lines
+
+    Args:
+        labeled (str): JSON string from node_speaker_separation
+
+    Returns:
+        str: One utterance per line; the input as-is if it is not valid JSON
+    """
+    try:
+        segments = json.loads(labeled)["segments"]
+        return "\n".join(f'{seg["speaker"]}: {seg["text"]}' for seg in segments)
+    except (ValueError, KeyError, TypeError):
+        return labeled
+
+
+def _verdict(result: dict) -> str:
+    if result.get("総合判定") in ("問題あり", "問題なし"):
+        return result["総合判定"]
+    return "問題あり" if "問題あり" in result.values() else "問題なし"
+
+
+def add_call(result: dict, labeled_transcript: str, *, source: str | None = None,
+             db_path: str | None = None) -> int:
+    """
+    Index one evaluated call
+
+    Args:
+        result (dict): Final evaluation result from node_to_json
+        labeled_transcript (str): Speaker-labeled transcript (JSON or plain text)
+        source (str, optional): Original file name. Defaults to None.
+        db_path (str, optional): Database path. Defaults to SEARCH_DB_PATH.
+
+    Returns:
+        int: Row id of the indexed call
+    """
+    summary = result.get("報告まとめ") or []
+    if isinstance(summary, str):
+        summary = [summary]
+    with closing(_connect(db_path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO calls (created_at, source, agent, verdict, transcript, summary, result_json)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now().isoformat(timespec="seconds"),
+                source,
+                result.get("テレアポ担当者名", "不明"),
+                _verdict(result),
+                format_transcript(labeled_transcript),
+                "\n".join(map(str, summary)),
+                json.dumps(result, ensure_ascii=False),
+            ),
+        )
+    logger.info("Indexed call %d (%s)", cur.lastrowid, source)
+    return cur.lastrowid
+
+
+def _substring_snippet(text: str, term: str, width: int = 40) -> str:
+    pos = text.find(term) if term else -1
+    if pos < 0:
+        return text[:width * 2]
+    start = max(pos - width, 0)
+    end = pos + len(term) + width
+    return (
+        ("…" if start > 0 else "")
+        + text[start:pos] + HIGHLIGHT_START + term + HIGHLIGHT_END
+        + text[pos + len(term):end]
+        + ("…" if end < len(text) else "")
+    )
+
+
+def search(query: str = "", *, agent: str | None = None, verdict: str | None = None,
+           limit: int = 50, db_path: str | None = None) -> list[dict]:
+    """
+    Search indexed calls
+
+    All whitespace-separated terms must appear in the transcript or summary.
+
+    Args:
+        query (str, optional): Search terms. Empty returns the latest calls.
+        agent (str, optional): Filter by agent name. Defaults to None.
+        verdict (str, optional): Filter by "問題あり" / "問題なし". Defaults to None.
+        limit (int, optional): Maximum number of results. Defaults to 50.
+        db_path (str, optional): Database path. Defaults to SEARCH_DB_PATH.
+
+    Returns:
+        list[dict]: Matches with id, created_at, source, agent, verdict, summary, snippet
+    """
+    terms = query.split()
+    fts_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+    # 記号だけの語はトークンにならないので calls_ngram では引かない
+    ngram_terms = [t for t in short_terms if t.isalnum()]
+
+    where, params = [], []
+    if fts_terms:
+        where.append("calls_fts MATCH ?")
+        params.append(" ".join('"' + t.replace('"', '""') + '"' for t in fts_terms))
+    if ngram_terms:
+        where.append("c.id IN (SELECT rowid FROM calls_ngram WHERE calls_ngram MATCH ?)")
+        params.append(" ".join(f'"{t}"' for t in ngram_terms))
+    # 記号を含む語はトークン化で分割されるため、最終的な一致は部分文字列で確認する
+    for term in short_terms:
+        where.append("(instr(c.transcript, ?) > 0 OR instr(c.summary, ?) > 0)")
+        params.extend([term, term])
+    if agent:
+        where.append("c.agent = ?")
+        params.append(agent)
+    if verdict:
+        where.append("c.verdict = ?")
+        params.append(verdict)
+
+    columns = "c.id, c.created_at, c.source, c.agent, c.verdict, c.summary"
+    if fts_terms:
+        sql = (
+            f"SELECT {columns}, snippet(calls_fts, -1, ?, ?, '…', 24) AS snippet"
+            " FROM calls_fts JOIN calls c ON c.id = calls_fts.rowid"
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_END] + params
+        order = "rank"
+    else:
+        sql = f"SELECT {columns}, c.transcript FROM calls c"
+        order = "c.id DESC"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+
+    with closing(_connect(db_path)) as conn, conn:
+        rows = [dict(row) for row in conn.execute(sql, params)]
+    if not fts_terms:
+        term = short_terms[0] if short_terms else ""
+        for row in rows:
+            # 語が要約にだけ現れる場合は要約から抜粋する
+            transcript = row.pop("transcript")
+            text = row["summary"] if term and term not in transcript and term in row["summary"] else transcript
+            row["snippet"] = _substring_snippet(text, term)
+    return rows
+
+
+def get_call(call_id: int, *, db_path: str | None = None) -> dict | None:
+    """
+    Get a single indexed call including transcript and full result
+
+    Args:
+        call_id (int): Row id returned by add_call / search
+        db_path (str, optional): Database path. Defaults to SEARCH_DB_PATH.
+
+    Returns:
+        dict | None: Call record, or None if not found
+    """
+    with closing(_connect(db_path)) as conn, conn:
+        row = conn.execute("SELECT * FROM calls WHERE id = ?", (call_id,)).fetchone()
+    if row is None:
+        return None
+    call = dict(row)
+    call["result"] = json.loads(call.pop("result_json"))
+    return call
+
+
+def list_agents(*, db_path: str | None = None) -> list[str]:
+    """
+    List agent names that appear in the index (for UI filters)
+
+    Args:
+        db_path (str, optional): Database path. Defaults to SEARCH_DB_PATH.
+
+    Returns:
+        list[str]: Distinct agent names
+    """
+    with closing(_connect(db_path)) as conn, conn:
+        return [r[0] for r in conn.execute(
+            "SELECT DISTINCT agent FROM calls WHERE agent IS NOT NULL ORDER BY agent"
+        )]
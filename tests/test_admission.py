@@ -0,0 +1,197 @@
+"""Test cases for the admission controller."""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, compute_capacity, MB
+
+
+def _controller(slots=1, max_queue=10, timeout=5.0, queue_budget_mb=10_000):
+    return AdmissionController(
+        {"transcribe": slots, "workflow": slots},
+        queue_budget_mb=queue_budget_mb, max_queue=max_queue, timeout=timeout,
+    )
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_waiters_are_admitted_in_fifo_order():
+    """Requests that queue up are admitted in arrival order with visible positions."""
+    controller = _controller(slots=1)
+    order, positions = [], {}
+    release = threading.Event()
+
+    def holder():
+        with controller.admit("transcribe"):
+            release.wait()
+
+    def waiter(i):
+        positions[i] = []
+        with controller.admit("transcribe", on_wait=positions[i].append):
+            order.append(i)
+
+    threads = [threading.Thread(target=holder)]
+    threads[0].start()
+    _wait_for(lambda: controller.status()["transcribe"]["active"] == 1)
+    for i in range(3):
+        t = threading.Thread(target=waiter, args=(i,))
+        t.start()
+        threads.append(t)
+        _wait_for(lambda: controller.status()["transcribe"]["waiting"] == i + 1)
+
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert order == [0, 1, 2]
+    # 順位は 1 始まりで減少し、受付時に 0 が通知される（途中の順位は飛ぶことがある）
+    for i in range(3):
+        assert positions[i][0] == i + 1
+        assert positions[i][-1] == 0
+        assert positions[i] == sorted(positions[i], reverse=True)
+    assert controller.status()["transcribe"] == {"slots": 1, "active": 0, "waiting": 0}
+
+
+def test_sheds_load_when_queue_is_full():
+    """A saturated stage rejects new requests instead of queueing them."""
+    controller = _controller(slots=1, max_queue=0)
+
+    with controller.admit("workflow"):
+        with pytest.raises(AdmissionRejected):
+            with controller.admit("workflow"):
+                pass
+
+    # 解放後は再び受け付ける
+    with controller.admit("workflow"):
+        pass
+
+
+def test_wait_times_out():
+    """Requests that wait longer than the timeout are rejected and leave the queue."""
+    controller = _controller(slots=1, timeout=0.05)
+
+    with controller.admit("transcribe"):
+        with pytest.raises(AdmissionRejected):
+            with controller.admit("transcribe"):
+                pass
+        assert controller.status()["transcribe"]["waiting"] == 0
+
+
+def test_stages_are_independent():
+    """Holding a transcription slot does not block the workflow stage."""
+    controller = _controller(slots=1, max_queue=0)
+
+    with controller.admit("transcribe"):
+        with controller.admit("workflow"):
+            pass
+
+
+def test_sheds_load_when_waiting_uploads_exceed_memory_budget():
+    """Uploads held by waiting requests count against the queue memory budget."""
+    controller = _controller(slots=1, queue_budget_mb=300)
+    release = threading.Event()
+    admitted = []
+
+    def holder():
+        with controller.admit("transcribe"):
+            release.wait()
+
+    def waiter():
+        with controller.admit("transcribe", nbytes=200 * MB):
+            admitted.append(True)
+
+    threads = [threading.Thread(target=holder), threading.Thread(target=waiter)]
+    threads[0].start()
+    _wait_for(lambda: controller.status()["transcribe"]["active"] == 1)
+    threads[1].start()
+    _wait_for(lambda: controller.status()["transcribe"]["waiting"] == 1)
+
+    # 200MB + 200MB は 300MB の予算を超える。受付前のチェックでも同じ判定になる
+    with pytest.raises(AdmissionRejected):
+        controller.check("transcribe", 200 * MB)
+    with pytest.raises(AdmissionRejected):
+        with controller.admit("transcribe", nbytes=200 * MB):
+            pass
+    controller.check("transcribe", 50 * MB)
+
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert admitted == [True]
+    assert controller.budget.used == 0
+
+
+def test_on_wait_runs_without_holding_the_stage_lock():
+    """A slow queue-position callback does not block other admits and releases."""
+    controller = _controller(slots=1)
+    release = threading.Event()
+    observed = []
+
+    def on_wait(position):
+        # 別スレッドからステージの状態を取得できること（ロックを保持していない）
+        t = threading.Thread(target=lambda: observed.append(controller.status()))
+        t.start()
+        t.join(1)
+        assert not t.is_alive()
+
+    def holder():
+        with controller.admit("transcribe"):
+            release.wait()
+
+    t = threading.Thread(target=holder)
+    t.start()
+    _wait_for(lambda: controller.status()["transcribe"]["active"] == 1)
+    release_timer = threading.Timer(0.2, release.set)
+    release_timer.start()
+    with controller.admit("transcribe", on_wait=on_wait):
+        pass
+    t.join(2)
+
+    assert len(observed) == 2
+
+
+@patch('admission.ADMISSION_TRANSCRIBE_SLOTS', 0)
+@patch('admission.ADMISSION_WORKFLOW_SLOTS', 0)
+@patch('admission.ADMISSION_RESERVED_MB', 500)
+@patch('admission.ADMISSION_TRANSCRIBE_JOB_MB', 500)
+@patch('admission.ADMISSION_WORKFLOW_JOB_MB', 300)
+@patch('admission.ADMISSION_IO_PER_CORE', 2)
+@patch('transcriber.TRANSCRIBE_BACKEND', 'api')
+def test_compute_capacity_api_backend():
+    """API transcription is bounded by memory and cores; leftover memory is the queue budget."""
+    # メモリ律速: 3500 - 500 = 3000 → 文字起こし 6 件で 3000MB を使い切る
+    assert compute_capacity(3500, 16) == ({"transcribe": 6, "workflow": 1}, 0)
+    # コア律速: 文字起こし 8 件 (4000MB)、評価 8 件 (2400MB)、残り 3100MB が待ち行列の予算
+    assert compute_capacity(10000, 4) == ({"transcribe": 8, "workflow": 8}, 3100)
+    # 最低 1
+    assert compute_capacity(100, 1) == ({"transcribe": 1, "workflow": 1}, 0)
+
+
+@patch('admission.ADMISSION_TRANSCRIBE_SLOTS', 0)
+@patch('admission.ADMISSION_WORKFLOW_SLOTS', 0)
+@patch('admission.ADMISSION_RESERVED_MB', 500)
+@patch('admission.ADMISSION_TRANSCRIBE_JOB_MB', 500)
+@patch('admission.ADMISSION_WORKFLOW_JOB_MB', 300)
+@patch('admission.ADMISSION_MODEL_MB', 1500)
+@patch('admission.ADMISSION_IO_PER_CORE', 2)
+@patch('transcriber.TRANSCRIBE_BACKEND', 'local')
+@patch('transcriber.WHISPER_MAX_MODELS', 1)
+def test_compute_capacity_local_backend():
+    """Local transcription slots follow the engine's workers, and the model is counted once."""
+    with patch('transcriber.WHISPER_NUM_WORKERS', 1), patch('transcriber.WHISPER_CPU_THREADS', 0):
+        # 1 ワーカーが全コアを使う → 同時 1 件
+        assert compute_capacity(16000, 8) == ({"transcribe": 1, "workflow": 16}, 8700)
+    with patch('transcriber.WHISPER_NUM_WORKERS', 4), patch('transcriber.WHISPER_CPU_THREADS', 4):
+        # 4 ワーカー × 4 スレッドは 8 コアに収まらない → 2 件
+        assert compute_capacity(16000, 8)[0]["transcribe"] == 2
+    with patch('transcriber.WHISPER_NUM_WORKERS', 4), patch('transcriber.WHISPER_CPU_THREADS', 0):
+        # 自動スレッド数は渡されたコア数を等分する
+        assert compute_capacity(16000, 8)[0]["transcribe"] == 4
@@ -0,0 +1,142 @@
+"""Test cases for the local proper-noun corrector."""
+import time
+
+import pytest
+
+from corrector import correct_proper_nouns, match_checker, to_hiragana, CHECKER_READINGS, NAME_VARIANTS
+from prompts import checker
+
+
+# 実際の文字起こしで見られた誤認識とその期待値
+MISRECOGNITION_CORPUS = [
+    # 会社名
+    ("株式会社スフィーダクロスの工藤と申します", "株式会社SFIDA Xの工藤と申します"),
+    ("スフィダエックスの前川です", "SFIDA Xの前川です"),
+    ("sfida xの猪俣です", "SFIDA Xの猪俣です"),
+    ("SFIDAXの田本と申します", "SFIDA Xの田本と申します"),
+    ("スピーダクロスの立川です", "SFIDA Xの立川です"),
+    ("ハロネットの件でお電話しました", "SFIDA Xの件でお電話しました"),
+    # 担当者名（漢字の誤変換）
+    ("SFIDA Xの浜田と申します", "SFIDA Xの濱田と申します"),
+    ("SFIDA Xの猪股です", "SFIDA Xの猪俣です"),
+    ("SFIDA Xの九藤です", "SFIDA Xの工藤です"),
+    # 担当者名（かな・ローマ字）
+    ("SFIDA Xのいのまたと申します", "SFIDA Xの猪俣と申します"),
+    ("SFIDA Xのイノマタです", "SFIDA Xの猪俣です"),
+    ("SFIDA Xのくどーです", "SFIDA Xの工藤です"),
+    ("SFIDA XのInomataと申します", "SFIDA Xの猪俣と申します"),
+    ("SFIDA XのKudouです", "SFIDA Xの工藤です"),
+    ("私は浜田と申します", "私は濱田と申します"),
+    ("担当のくどうでございます", "担当の工藤でございます"),
+    ("私、たちかわと申します", "私、立川と申します"),
+    ("はい、まえかわと申します", "はい、前川と申します"),
+    ("SFIDA Xのたもとでございます", "SFIDA Xの田本でございます"),
+    # 助詞と同じ文字で始まる名前
+    ("SFIDA Xのはまだです", "SFIDA Xの濱田です"),
+    ("私、はまだと申します", "私、濱田と申します"),
+    ("担当のはまだでございます", "担当の濱田でございます"),
+    ("私はくどうと申します", "私は工藤と申します"),
+    # 迷惑電話防止・電話が鳴る
+    ("明確電話防止のため録音しております", "迷惑電話防止のため録音しております"),
+    ("めいわくでんわぼうしのため", "迷惑電話防止のため"),
+    (
+        "迷惑電話帽子のため\n電話が鳴っています\n電話が出てきました\n電話が切れています",
+        "迷惑電話防止のため\n電話が鳴る\n電話が鳴る\n電話が鳴る",
+    ),
+]
+
+# 補正してはいけない文
+UNCHANGED_CORPUS = [
+    "そのものはまだです",
+    "それはまだ決まっていません",
+    "電話が鳴っていますね",
+    "渡辺と申します",
+    "SFIDA Xのスタッフです",
+    "タチカワブラインドさんですね",
+    # 一人称・「担当」に続く普通の会話
+    "私はまだです",
+    "わたしもまだです",
+    "私もどうです",
+    "私はもとです",
+    "担当はまだです",
+    # 名乗り以外の顧客名・地名・社名
+    "今日は浜田さんにお伺いしました",
+    "浜田市のお客様です",
+    "マエカワ製作所さんですね",
+    # 担当者と 1 文字違いの別の名字
+    "私、いまがわと申します",
+    "担当のたけかわでございます",
+    "SFIDA Xのたけかわです",
+    # 社名と似たカタカナ語
+    "スピーダーで検索",
+    "スフィダクロスオーバーの件",
+    "ハロネットワークの設定",
+]
+
+
+@pytest.mark.parametrize("raw,expected", MISRECOGNITION_CORPUS)
+def test_corrects_known_misrecognitions(raw, expected):
+    """Known misrecognitions are normalized."""
+    assert correct_proper_nouns(raw) == expected
+
+
+@pytest.mark.parametrize("text", UNCHANGED_CORPUS)
+def test_leaves_other_text_unchanged(text):
+    """Ordinary words and unknown names are not touched."""
+    assert correct_proper_nouns(text) == text
+
+
+def test_ring_phrase_only_after_nuisance_phrase():
+    """Ring expressions are normalized only after the 迷惑電話防止 announcement."""
+    text = "電話が鳴っています\n迷惑電話防止のため\n電話が鳴っています"
+
+    assert correct_proper_nouns(text) == "電話が鳴っています\n迷惑電話防止のため\n電話が鳴る"
+
+
+def test_nuisance_phrase_only_in_opening():
+    """迷惑電話防止 variants far from the opening are left alone."""
+    text = "あ" * 300 + "明確電話防止"
+
+    assert correct_proper_nouns(text) == text
+
+
+@pytest.mark.parametrize(
+    "token,expected",
+    [
+        ("くどう", "工藤"),
+        ("Hamada", "濱田"),
+        ("タテカワ", "立川"),
+        ("わたなべ", None),
+        ("まだ", None),
+        ("いまがわ", None),
+        ("たけかわ", None),
+        ("山田", None),
+    ],
+)
+def test_match_checker(token, expected):
+    """Tokens are fuzzy-matched against the checker list."""
+    assert match_checker(token) == expected
+
+
+def test_name_tables_cover_checker():
+    """Every checker name has readings and variants, and no stale names remain."""
+    assert set(CHECKER_READINGS) == set(checker)
+    assert set(NAME_VARIANTS) == set(checker)
+
+
+def test_to_hiragana():
+    """Katakana and romaji are normalized to hiragana."""
+    assert to_hiragana("イノマタ") == "いのまた"
+    assert to_hiragana("Inomata") == "いのまた"
+    assert to_hiragana("クドー") == "くどう"
+
+
+def test_runs_in_milliseconds():
+    """A long transcript is corrected well within the LLM call's latency."""
+    transcript = "\n".join(raw for raw, _ in MISRECOGNITION_CORPUS) * 50
+
+    start = time.perf_counter()
+    correct_proper_nouns(transcript)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
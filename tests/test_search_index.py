@@ -0,0 +1,132 @@
+"""Test cases for the full-text search index."""
+import json
+import time
+
+import pytest
+
+from search_index import (
+    add_call,
+    format_transcript,
+    get_call,
+    list_agents,
+    search,
+    HIGHLIGHT_START,
+    HIGHLIGHT_END,
+)
+
+
+def _labeled(*utterances):
+    return json.dumps({"segments": [{"speaker": s, "text": t} for s, t in utterances]}, ensure_ascii=False)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "calls.db")
+    add_call(
+        {"テレアポ担当者名": "工藤", "総合判定": "問題なし", "報告まとめ": []},
+        _labeled(("agent", "SFIDA Xの工藤と申します。"), ("customer", "今は他社のソフトを使っています。")),
+        source="a.wav",
+        db_path=path,
+    )
+    add_call(
+        {"テレアポ担当者名": "濱田", "怒らせた": "問題あり", "報告まとめ": ["顧客を怒らせた。"]},
+        _labeled(("agent", "SFIDA Xの濱田です。"), ("customer", "しつこいな、もう電話しないで。")),
+        source="b.wav",
+        db_path=path,
+    )
+    return path
+
+
+def test_format_transcript():
+    """Speaker JSON becomes one labeled line per utterance."""
+    assert format_transcript(_labeled(("agent", "はい"), ("customer", "どうも"))) == "agent: はい\ncustomer: どうも"
+    assert format_transcript("not json") == "not json"
+
+
+def test_search_phrase(db_path):
+    """Trigram-indexed phrases are found with a highlighted snippet."""
+    results = search("他社のソフト", db_path=db_path)
+
+    assert [r["source"] for r in results] == ["a.wav"]
+    assert f"{HIGHLIGHT_START}他社のソフト{HIGHLIGHT_END}" in results[0]["snippet"]
+
+
+def test_search_short_term(db_path):
+    """Terms shorter than a trigram are found through the n-gram index."""
+    results = search("濱田", db_path=db_path)
+
+    assert [r["source"] for r in results] == ["b.wav"]
+    assert HIGHLIGHT_START in results[0]["snippet"]
+
+
+def test_search_summary(db_path):
+    """Report summaries are searchable too, with the snippet taken from the summary."""
+    assert [r["source"] for r in search("怒らせた", db_path=db_path)] == ["b.wav"]
+
+    results = search("顧客", db_path=db_path)
+    assert [r["source"] for r in results] == ["b.wav"]
+    assert results[0]["snippet"] == f"{HIGHLIGHT_START}顧客{HIGHLIGHT_END}を怒らせた。"
+
+
+def test_search_filters(db_path):
+    """Agent and verdict filters narrow the results; verdict is derived when 総合判定 is missing."""
+    assert [r["source"] for r in search("SFIDA", agent="工藤", db_path=db_path)] == ["a.wav"]
+    assert [r["source"] for r in search(verdict="問題あり", db_path=db_path)] == ["b.wav"]
+    assert [r["source"] for r in search(db_path=db_path)] == ["b.wav", "a.wav"]
+
+
+def test_get_call_and_agents(db_path):
+    """Full records and agent lists are available for the UI."""
+    call = get_call(search("しつこい", db_path=db_path)[0]["id"], db_path=db_path)
+
+    assert call["transcript"].startswith("agent: SFIDA Xの濱田です。")
+    assert call["result"]["怒らせた"] == "問題あり"
+    assert list_agents(db_path=db_path) == sorted(["工藤", "濱田"])
+
+
+@pytest.fixture(scope="module")
+def large_db_path(tmp_path_factory):
+    """Index with tens of thousands of calls; every 100th mentions a competitor."""
+    from contextlib import closing
+    from search_index import _connect
+
+    path = str(tmp_path_factory.mktemp("large") / "large.db")
+    rows = [
+        (
+            "2026-01-01T00:00:00", f"{i}.wav", "工藤", "問題なし",
+            f"agent: SFIDA Xの工藤と申します。通話番号{i}です。\ncustomer: 結構です。" * 20
+            + ("\ncustomer: 今は他社を使っています。" if i % 100 == 0 else ""),
+            "", "{}",
+        )
+        for i in range(20000)
+    ]
+    with closing(_connect(path)) as conn, conn:
+        conn.executemany(
+            "INSERT INTO calls (created_at, source, agent, verdict, transcript, summary, result_json)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return path
+
+
+def test_search_is_fast_on_large_index(large_db_path):
+    """Queries stay well under a second with tens of thousands of calls."""
+    start = time.perf_counter()
+    results = search("通話番号12345", db_path=large_db_path)
+    elapsed = time.perf_counter() - start
+
+    assert [r["source"] for r in results] == ["12345.wav"]
+    assert elapsed < 1.0
+
+
+@pytest.mark.parametrize("query", ["他社", "他社 結構です"])
+def test_short_term_search_is_fast_on_large_index(large_db_path, query):
+    """Two-character terms are served by the n-gram index, not a table scan."""
+    start = time.perf_counter()
+    results = search(query, limit=500, db_path=large_db_path)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 200
+    assert all(int(r["source"].split(".")[0]) % 100 == 0 for r in results)
+    assert elapsed < 0.3
+
@@ -0,0 +1,128 @@
+"""Test cases for the local transcription engine."""
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+import transcriber
+from transcriber import choose_model_size, resolve_cpu_threads, transcribe_detailed
+
+
+@pytest.mark.parametrize(
+    "duration,backlog,expected",
+    [
+        (60, 0, "medium"),
+        (900, 0, "small"),
+        (60, 2, "small"),
+        (3600, 0, "base"),
+        (60, 5, "base"),
+    ],
+)
+def test_choose_model_size(duration, backlog, expected):
+    """Longer recordings and busier hosts get smaller models."""
+    assert choose_model_size(duration, backlog) == expected
+
+
+@patch('transcriber.available_cores', return_value=8)
+def test_resolve_cpu_threads(mock_cores):
+    """Cores are split across workers unless threads are set explicitly."""
+    assert resolve_cpu_threads(0, 1) == 8
+    assert resolve_cpu_threads(0, 3) == 2
+    assert resolve_cpu_threads(0, 16) == 1
+    assert resolve_cpu_threads(4, 2) == 4
+
+
+def _segments(*texts):
+    return [MagicMock(text=t) for t in texts], MagicMock()
+
+
+@patch('transcriber._batched_pipeline')
+@patch('transcriber.get_model')
+@patch('transcriber._decode_audio')
+def test_short_audio_is_decoded_sequentially(mock_decode, mock_get_model, mock_batched):
+    """Short recordings use the plain model with VAD filtering."""
+    mock_decode.return_value = [0.0] * transcriber.SAMPLE_RATE * 30
+    model = mock_get_model.return_value
+    model.transcribe.return_value = _segments("もしもし", "はい")
+
+    text, stats = transcribe_detailed(b'dummy', model_size="auto", batch_size=8)
+
+    assert text == "もしもし はい"
+    assert stats["model"] == "medium"
+    assert stats["duration"] == 30
+    assert stats["batched"] is False
+    model.transcribe.assert_called_once()
+    mock_batched.assert_not_called()
+
+
+@patch('transcriber._batched_pipeline')
+@patch('transcriber.get_model')
+@patch('transcriber._decode_audio')
+def test_long_audio_uses_batched_pipeline(mock_decode, mock_get_model, mock_batched):
+    """Long recordings go through BatchedInferencePipeline."""
+    mock_decode.return_value = [0.0] * transcriber.SAMPLE_RATE * 900
+    mock_batched.return_value.transcribe.return_value = _segments("テスト")
+
+    text, stats = transcribe_detailed(b'dummy', model_size="auto", batch_size=8)
+
+    assert text == "テスト"
+    assert stats["model"] == "small"
+    assert stats["batched"] is True
+    mock_batched.return_value.transcribe.assert_called_once()
+    assert mock_batched.return_value.transcribe.call_args.kwargs["batch_size"] == 8
+    assert transcriber._inflight == 0
+
+
+@pytest.fixture
+def fake_whisper():
+    """Replace faster_whisper.WhisperModel and start from an empty model cache."""
+    fake_module = MagicMock()
+    fake_module.WhisperModel.side_effect = lambda size, **kwargs: MagicMock(size=size, kwargs=kwargs)
+    with patch.dict('sys.modules', {'faster_whisper': fake_module}), \
+            patch.object(transcriber, '_models', transcriber.OrderedDict()):
+        yield fake_module
+
+
+@patch('transcriber.WHISPER_MAX_MODELS', 2)
+def test_model_cache_evicts_least_recently_used(fake_whisper):
+    """Only WHISPER_MAX_MODELS sizes stay loaded; the oldest is evicted."""
+    medium = transcriber.get_model("medium", cpu_threads=4, num_workers=1)
+    transcriber.get_model("small", cpu_threads=4, num_workers=1)
+    assert transcriber.get_model("medium", cpu_threads=4, num_workers=1) is medium
+
+    transcriber.get_model("base", cpu_threads=4, num_workers=1)
+
+    assert list(transcriber._models) == ["medium", "base"]
+    assert fake_whisper.WhisperModel.call_count == 3
+
+
+def test_model_cache_reloads_on_new_settings(fake_whisper):
+    """A size is kept once, with the most recently requested thread settings."""
+    transcriber.get_model("medium", cpu_threads=4, num_workers=1)
+    model = transcriber.get_model("medium", cpu_threads=2, num_workers=2)
+
+    assert list(transcriber._models) == ["medium"]
+    assert model.kwargs["cpu_threads"] == 2
+
+
+@patch('transcriber.WHISPER_MAX_MODELS', 1)
+def test_auto_prefers_loaded_model(fake_whisper):
+    """Auto reuses the loaded size instead of evicting it to load another."""
+    transcriber.get_model("medium")
+
+    assert transcriber._prefer_loaded("small") == "medium"
+    assert transcriber._prefer_loaded("medium") == "medium"
+
+
+@patch('transcriber.WHISPER_MAX_MODELS', 1)
+@patch('transcriber._decode_audio', return_value=[0.0] * transcriber.SAMPLE_RATE * 60)
+def test_auto_uses_queue_backlog_and_keeps_loaded_model(mock_decode, fake_whisper):
+    """A busy queue picks a smaller model, which then stays loaded once the queue drains."""
+    fake_whisper.WhisperModel.side_effect = None
+    fake_whisper.WhisperModel.return_value.transcribe.return_value = _segments("はい")
+
+    _, busy = transcribe_detailed(b'dummy', model_size="auto", backlog=2)
+    _, idle = transcribe_detailed(b'dummy', model_size="auto", backlog=0)
+
+    assert busy["model"] == "small"
+    assert idle["model"] == "small"
+    assert fake_whisper.WhisperModel.call_count == 1
@@ -72,14 +72,13 @@ class TestWorkflow(unittest.TestCase):
         
         # 検証
         mock_whisper.assert_called_once_with(b'dummy_audio_bytes')
-        mock_workflow.assert_called_once_with("テスト文字起こし")
+        mock_workflow.assert_called_once_with("テスト文字起こし", source=None)
         self.assertEqual(result, {"評価": "A"})
 
 
 @pytest.mark.parametrize(
     "node_func,expected_result",
     [
-        (node_replace, "整形されたテキスト"),
         (node_speaker_separation, "営業担当: テスト\nお客様: 返答"),
         (node_company_check, '{"自社名明示": true}'),
         (node_approach_check, '{"ニーズ把握": 4}'),
@@ -102,5 +101,39 @@ def test_node_functions(mock_chat, node_func, expected_result):
     mock_chat.assert_called_once()
 
 
+@patch('workflow._chat')
+def test_node_replace_local(mock_chat):
+    """node_replace uses the local corrector by default."""
+    result = node_replace("スフィーダクロスのくどうと申します")
+
+    assert result == "SFIDA Xの工藤と申します"
+    mock_chat.assert_not_called()
+
+
+@patch('workflow.REPLACE_BACKEND', 'llm')
+@patch('workflow._chat')
+def test_node_replace_llm_fallback(mock_chat):
+    """node_replace falls back to the LLM when REPLACE_BACKEND is "llm"."""
+    mock_chat.return_value = "整形されたテキスト"
+
+    result = node_replace("テスト入力")
+
+    assert result == "整形されたテキスト"
+    mock_chat.assert_called_once()
+
+
+@patch('transcriber.TRANSCRIBE_BACKEND', 'local')
+@patch('transcriber.transcribe', return_value="もしもし")
+@patch('admission.get_controller')
+def test_whisper_transcribe_local_uses_queue_backlog(mock_controller, mock_transcribe):
+    """The local engine sizes its model from the admission queue, excluding the caller."""
+    mock_controller.return_value.status.return_value = {
+        "transcribe": {"slots": 1, "active": 1, "waiting": 3},
+    }
+
+    assert whisper_transcribe(b'dummy') == "もしもし"
+    mock_transcribe.assert_called_once_with(b'dummy', backlog=3)
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""Local transcription engine on top of faster-whisper.
+
+Models are loaded once per process and shared between sessions; at most
+WHISPER_MAX_MODELS sizes stay loaded (least recently used is evicted). Long
+recordings are decoded with BatchedInferencePipeline (VAD-based chunking),
+and the model size is chosen from the recording length and the number of
+transcriptions running or queued when WHISPER_LOCAL_MODEL is "auto". Once
+the cache is full, "auto" keeps using the loaded sizes instead of evicting one.
+"""
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.logger import logger
+
+SAMPLE_RATE = 16000
+
+# 文字起こし: "api"（Whisper API, 既定）または "local"（このモジュール）
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "api")
+WHISPER_LOCAL_MODEL = os.getenv("WHISPER_LOCAL_MODEL", "auto")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+# 0 の場合は利用可能コア数 / num_workers
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+# この長さ（秒）以上の音声はバッチ推論で処理する
+WHISPER_BATCH_MIN_SECONDS = float(os.getenv("WHISPER_BATCH_MIN_SECONDS", "120"))
+# 同時にメモリに保持するモデルサイズの数（超えたら最も古く使われたものを解放）
+WHISPER_MAX_MODELS = int(os.getenv("WHISPER_MAX_MODELS", "1"))
+
+# (最大音声長[秒], 最大同時実行数, モデルサイズ) — 上から順に評価
+MODEL_TIERS: list[tuple[float, int, str]] = [
+    (600, 1, "medium"),
+    (1800, 3, "small"),
+]
+FALLBACK_MODEL = "base"
+
+# size -> (settings, model)。LRU 順（末尾が最新）
+_models: OrderedDict[str, tuple[tuple, object]] = OrderedDict()
+_models_lock = threading.Lock()
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def resolve_cpu_threads(cpu_threads: int = 0, num_workers: int = 1) -> int:
+    """
+    Resolve the CTranslate2 thread count for one model instance
+
+    Args:
+        cpu_threads (int, optional): Explicit thread count; 0 splits the cores across workers. Defaults to 0.
+        num_workers (int, optional): Number of parallel decoders. Defaults to 1.
+
+    Returns:
+        int: Threads per worker
+    """
+    if cpu_threads > 0:
+        return cpu_threads
+    return max(1, available_cores() // max(1, num_workers))
+
+
+def choose_model_size(duration: float, backlog: int = 0) -> str:
+    """
+    Choose a model size for a recording
+
+    Args:
+        duration (float): Recording length in seconds
+        backlog (int, optional): Other transcriptions running or queued. Defaults to 0.
+
+    Returns:
+        str: faster-whisper model size
+    """
+    for max_duration, max_backlog, size in MODEL_TIERS:
+        if duration <= max_duration and backlog < max_backlog:
+            return size
+    return FALLBACK_MODEL
+
+
+def get_model(size: str, *, cpu_threads: int = WHISPER_CPU_THREADS,
+              num_workers: int = WHISPER_NUM_WORKERS):
+    """
+    Get a cached WhisperModel (loaded on first use)
+
+    Args:
+        size (str): Model size, e.g. "medium"
+        cpu_threads (int, optional): Threads per worker (0 = auto). Defaults to WHISPER_CPU_THREADS.
+        num_workers (int, optional): Parallel decoders. Defaults to WHISPER_NUM_WORKERS.
+
+    Returns:
+        faster_whisper.WhisperModel: Shared model instance
+    """
+    threads = resolve_cpu_threads(cpu_threads, num_workers)
+    settings = (WHISPER_DEVICE, WHISPER_COMPUTE_TYPE, threads, num_workers)
+    with _models_lock:
+        cached = _models.get(size)
+        if cached is not None and cached[0] == settings:
+            _models.move_to_end(size)
+            return cached[1]
+
+        # 同じサイズの設定違い・古いモデルを解放してからロードする。
+        # 実行中の文字起こしが参照しているモデルは、その処理が終わった時点で解放される
+        _models.pop(size, None)
+        while len(_models) >= max(1, WHISPER_MAX_MODELS):
+            evicted, _ = _models.popitem(last=False)
+            logger.info("Evicting WhisperModel %s", evicted)
+
+        from faster_whisper import WhisperModel
+
+        logger.info("Loading WhisperModel %s (threads=%d, workers=%d)", size, threads, num_workers)
+        model = WhisperModel(
+            size,
+            device=WHISPER_DEVICE,
+            compute_type=WHISPER_COMPUTE_TYPE,
+            cpu_threads=threads,
+            num_workers=num_workers,
+        )
+        _models[size] = (settings, model)
+        return model
+
+
+def _prefer_loaded(size: str) -> str:
+    """
+    Reuse an already-loaded size instead of evicting one to load another
+
+    Args:
+        size (str): Size chosen by choose_model_size
+
+    Returns:
+        str: size, or the most recently used loaded size when loading would evict
+    """
+    with _models_lock:
+        if size in _models or len(_models) < max(1, WHISPER_MAX_MODELS):
+            return size
+        return next(reversed(_models))
+
+
+def _decode_audio(file_bytes: bytes):
+    from faster_whisper import decode_audio
+
+    return decode_audio(io.BytesIO(file_bytes), sampling_rate=SAMPLE_RATE)
+
+
+def _batched_pipeline(model):
+    from faster_whisper import BatchedInferencePipeline
+
+    return BatchedInferencePipeline(model=model)
+
+
+def transcribe_detailed(file_bytes: bytes, *, model_size: str | None = None,
+                        cpu_threads: int = WHISPER_CPU_THREADS,
+                        num_workers: int = WHISPER_NUM_WORKERS,
+                        batch_size: int = WHISPER_BATCH_SIZE,
+                        backlog: int | None = None) -> tuple[str, dict]:
+    """
+    Transcribe audio locally and report timing statistics
+
+    Args:
+        file_bytes (bytes): Audio file bytes
+        model_size (str, optional): Model size; None uses WHISPER_LOCAL_MODEL. Defaults to None.
+        cpu_threads (int, optional): Threads per worker (0 = auto). Defaults to WHISPER_CPU_THREADS.
+        num_workers (int, optional): Parallel decoders. Defaults to WHISPER_NUM_WORKERS.
+        batch_size (int, optional): Batch size for long recordings; 1 disables batching. Defaults to WHISPER_BATCH_SIZE.
+        backlog (int, optional): Other transcriptions running or queued, used by "auto";
+            None counts the ones running in this engine. Defaults to None.
+
+    Returns:
+        tuple[str, dict]: Transcript and stats (model, duration, elapsed, rtf, batched)
+    """
+    global _inflight
+    with _inflight_lock:
+        if backlog is None:
+            backlog = _inflight
+        _inflight += 1
+    try:
+        audio = _decode_audio(file_bytes)
+        duration = len(audio) / SAMPLE_RATE
+        size = model_size or WHISPER_LOCAL_MODEL
+        if size == "auto":
+            size = _prefer_loaded(choose_model_size(duration, backlog))
+        model = get_model(size, cpu_threads=cpu_threads, num_workers=num_workers)
+
+        start = time.perf_counter()
+        batched = batch_size > 1 and duration >= WHISPER_BATCH_MIN_SECONDS
+        if batched:
+            segments, _ = _batched_pipeline(model).transcribe(audio, language="ja", batch_size=batch_size)
+        else:
+            segments, _ = model.transcribe(audio, language="ja", vad_filter=True)
+        # segments はジェネレータなので、ここで実際にデコードされる
+        transcript = " ".join(segment.text for segment in segments)
+        elapsed = time.perf_counter() - start
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+
+    stats = {
+        "model": size,
+        "duration": duration,
+        "elapsed": elapsed,
+        "rtf": elapsed / duration if duration else 0.0,
+        "batched": batched,
+    }
+    logger.info(
+        "Local transcription: model=%s duration=%.1fs elapsed=%.1fs rtf=%.3f batched=%s",
+        size, duration, elapsed, stats["rtf"], batched,
+    )
+    return transcript, stats
+
+
+def transcribe(file_bytes: bytes, backlog: int | None = None) -> str:
+    """
+    Transcribe audio locally with the configured engine settings
+
+    Args:
+        file_bytes (bytes): Audio file bytes
+        backlog (int, optional): Other transcriptions running or queued. Defaults to None.
+
+    Returns:
+        str: Full transcript text
+    """
+    return transcribe_detailed(file_bytes, backlog=backlog)[0]
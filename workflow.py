@@ -2,10 +2,16 @@
 import os
 import json
 import textwrap
+from functools import partial
+from typing import Callable
 import httpx
 from openai import OpenAI
 from utils.logger import logger
 from prompts import SYSTEM_PROMPTS
+from corrector import correct_proper_nouns
+import search_index
+import transcriber
+import admission
 
 # 環境変数からプロキシ設定を一時的に保存して削除
 proxy_env_vars = {}
@@ -27,6 +33,10 @@ client = OpenAI(
 )
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-1")
+# 固有名詞補正: "local"（ルールベース, 既定）または "llm"（SYSTEM_PROMPTS["replace"]）
+REPLACE_BACKEND = os.getenv("REPLACE_BACKEND", "local")
+# 評価済み通話を全文検索インデックスに保存するか
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
 
 # 環境変数のプロキシ設定を復元（必要であれば）
 # for var, value in proxy_env_vars.items():
@@ -37,6 +47,8 @@ WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-1")
 def whisper_transcribe(file_bytes: bytes) -> str:
     """
     Call Whisper API and return full transcript string
+
+    Uses the local faster-whisper engine when transcriber.TRANSCRIBE_BACKEND is "local".
     
     Args:
         file_bytes (bytes): Audio file bytes
@@ -44,6 +56,10 @@ def whisper_transcribe(file_bytes: bytes) -> str:
     Returns:
         str: Full transcript text
     """
+    if transcriber.TRANSCRIBE_BACKEND == "local":
+        # モデルサイズは受付制御の実行中・待機中の件数から選ぶ（この呼び出し自身は active に含まれる）
+        load = admission.get_controller().status()["transcribe"]
+        return transcriber.transcribe(file_bytes, backlog=max(0, load["active"] + load["waiting"] - 1))
     try:
         resp = client.audio.transcriptions.create(
             model=WHISPER_MODEL,
@@ -92,7 +108,9 @@ def _chat(system_prompt, user_prompt, *, expect_json=False, temperature=0.0):
 
 def node_replace(transcript: str) -> str:
     """
-    Clean up transcript by removing filler words and improving readability
+    Normalize proper nouns (company / agent names, fixed phrases) in the transcript
+
+    Uses the local corrector unless REPLACE_BACKEND is "llm".
     
     Args:
         transcript (str): Raw transcript text
@@ -100,8 +118,10 @@ def node_replace(transcript: str) -> str:
     Returns:
         str: Cleaned transcript text
     """
-    system_prompt = SYSTEM_PROMPTS["replace"]
-    return _chat(system_prompt, transcript)
+    if REPLACE_BACKEND == "llm":
+        system_prompt = SYSTEM_PROMPTS["replace"]
+        return _chat(system_prompt, transcript)
+    return correct_proper_nouns(transcript)
 
 
 def node_speaker_separation(transcript: str) -> str:
@@ -204,12 +224,13 @@ def node_to_json(results: dict[str, str]) -> dict:
 
 # ---------- public entrypoint ----------
 
-def run_workflow(transcript: str) -> dict:
+def run_workflow(transcript: str, *, source: str | None = None) -> dict:
     """
     Run the full evaluation workflow on a transcript
     
     Args:
         transcript (str): Raw transcript text
+        source (str, optional): Original file name, stored in the search index. Defaults to None.
         
     Returns:
         dict: Evaluation results as JSON
@@ -250,21 +271,37 @@ def run_workflow(transcript: str) -> dict:
     
     final_json = node_to_json(results)
     logger.info("Created final JSON output")
+
+    if SEARCH_INDEX_ENABLED:
+        try:
+            search_index.add_call(final_json, with_speakers, source=source)
+        except Exception as e:
+            logger.exception("検索インデックスへの登録に失敗しました: %s", str(e))
     
     return final_json
 
 
-def run_pipeline(file_bytes: bytes) -> dict:
+def run_pipeline(file_bytes: bytes, *, source: str | None = None,
+                 on_wait: Callable[[str, int], None] | None = None) -> dict:
     """
     Run the complete pipeline from audio to evaluation results
+
+    Transcription and the workflow each run under the process-wide admission
+    controller, so concurrent sessions queue instead of exhausting memory.
     
     Args:
         file_bytes (bytes): Audio file bytes
+        source (str, optional): Original file name, stored in the search index. Defaults to None.
+        on_wait (Callable[[str, int], None], optional): Called with (stage, queue position) while waiting. Defaults to None.
         
     Returns:
         dict: Evaluation results as JSON
     """
-    txt = whisper_transcribe(file_bytes)
+    # 待機中もアップロードをメモリに保持するので、そのサイズを待ち行列の予算に計上する
+    nbytes = len(file_bytes)
+    with admission.admit("transcribe", on_wait and partial(on_wait, "transcribe"), nbytes):
+        txt = whisper_transcribe(file_bytes)
     logger.info("Whisper done (%d chars)", len(txt))
-    result_json = run_workflow(txt)
+    with admission.admit("workflow", on_wait and partial(on_wait, "workflow"), nbytes):
+        result_json = run_workflow(txt, source=source)
     return result_json 
\ No newline at end of file